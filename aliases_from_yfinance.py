@@ -5,16 +5,41 @@ from functools import lru_cache
 
 import yfinance as yf
 
-# Common corporate suffixes to strip from names
-CORP_SUFFIXES = [
+from cache import FileCache
+
+# Disk cache (L2 under the lru_cache): company names barely change,
+# so 30 days of TTL spares yfinance a hit on every run.
+_ALIAS_CACHE = FileCache("aliases", ttl_seconds=30 * 24 * 3600)
+
+# Common corporate suffixes to strip from names (frozenset: O(1) membership)
+CORP_SUFFIXES = frozenset([
     "inc.", "inc", "corp.", "corp", "corporation",
     "co.", "co", "ltd.", "ltd",
     "s.a.", "s.a", "sa", "s.a.c.i.",
     "plc", "ag", "nv"
-]
+])
+
+# Compiled once at import; skips re's cache lookup on every call
+_WS_RE = re.compile(r"\s+")
+
+# Matches any chain of trailing suffix tokens (with optional trailing dot)
+# in one pass, e.g. " Co Ltd." — longest alternatives first so "corporation"
+# wins over "corp"
+_SUFFIX_RE = re.compile(
+    r"(?:\s+(?:"
+    + "|".join(
+        sorted(
+            {re.escape(s.rstrip(".")) for s in CORP_SUFFIXES},
+            key=len,
+            reverse=True,
+        )
+    )
+    + r")\.?)+\s*$",
+    re.IGNORECASE,
+)
 
 def _normalize_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
+    return _WS_RE.sub(" ", s).strip()
 
 def _strip_suffixes(name: str) -> str:
     """
@@ -23,18 +48,10 @@ def _strip_suffixes(name: str) -> str:
     """
     name = name.strip()
     # Remove stuff after comma, e.g. "MercadoLibre, Inc." -> "MercadoLibre"
-    name = name.split(",")[0]
-
-    tokens = name.split()
-    # Drop trailing suffix tokens
-    while tokens:
-        last = tokens[-1].lower().strip(".")
-        if last in CORP_SUFFIXES:
-            tokens.pop()
-        else:
-            break
+    name = name.split(",")[0].strip()
 
-    return " ".join(tokens).strip()
+    # Drop the whole chain of trailing suffix tokens in one regex pass
+    return _SUFFIX_RE.sub("", name).strip()
 
 
 @lru_cache(maxsize=512)
@@ -44,6 +61,11 @@ def get_aliases_from_yfinance(ticker: str) -> list[str]:
     using yfinance metadata.
     """
     ticker = ticker.upper()
+
+    cached = _ALIAS_CACHE.get(ticker)
+    if cached is not None:
+        return cached
+
     aliases: set[str] = set()
 
     # Always include some ticker variants
@@ -84,4 +106,10 @@ def get_aliases_from_yfinance(ticker: str) -> list[str]:
     # (Optional) You can still manually add special nicknames here if needed
     # e.g. if ticker == "META": aliases.add("Facebook")
 
-    return sorted(aliases)
+    result = sorted(aliases)
+    # Only cache lookups that actually got company names from yfinance:
+    # a failed/offline lookup yields just the ticker variants, and caching
+    # that would pin impoverished queries for the whole 30-day TTL.
+    if raw_names:
+        _ALIAS_CACHE.set(ticker, result)
+    return result
@@ -0,0 +1,59 @@
+# cache.py
+
+from __future__ import annotations
+
+import json
+import time
+from hashlib import md5
+from pathlib import Path
+
+# All cached entries live under .cache/<name>/<key>.json
+CACHE_ROOT = Path(".cache")
+
+
+class FileCache:
+    """
+    Tiny JSON-on-disk cache with a per-cache TTL.
+
+    Each entry is a file `{"ts": epoch_seconds, "data": ...}`; expired or
+    unreadable entries are treated as misses. Writes are best-effort: a
+    failed write never breaks the caller, it just means no cache next run.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float):
+        self.directory = CACHE_ROOT / name
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str):
+        """Return the cached data for `key`, or None on miss/expiry."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (ValueError, OSError):
+            return None
+
+        if time.time() - entry.get("ts", 0) > self.ttl_seconds:
+            return None
+
+        return entry.get("data")
+
+    def set(self, key: str, data) -> None:
+        """Store `data` (anything JSON-serializable) under `key`."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            payload = json.dumps({"ts": time.time(), "data": data})
+            self._path(key).write_text(payload, encoding="utf-8")
+        except OSError:
+            pass  # cache is best-effort
+
+
+def params_key(params: dict) -> str:
+    """Stable cache key for a params dict (md5 over the sorted items)."""
+    blob = json.dumps(params, sort_keys=True, default=str)
+    return md5(blob.encode("utf-8")).hexdigest()
@@ -2,36 +2,33 @@
 
 from __future__ import annotations
 
+import os
+from multiprocessing import Pool
+
 import numpy as np
 import pandas as pd
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
-# Global analyzer (created once)
+# Global analyzer (created once; re-created per worker process in parallel runs)
 _SIA = SentimentIntensityAnalyzer()
 
+# Below this many texts, fork + IPC overhead outweighs the parallel speedup
+_PARALLEL_MIN_TEXTS = 200
 
-def _sentiment_for_text(text: str | None) -> tuple[float | None, str | None]:
-    """
-    Compute VADER sentiment for a piece of text.
+# Rows scored per chunk: bounds peak memory for the text slices no matter
+# how large the DB grows, and each chunk is a natural Pool work unit
+_CHUNK_ROWS = 10_000
 
-    Returns:
-        (compound_score, label) where label in {"positive","negative","neutral"}.
-        If text is empty/None, returns (None, None).
-    """
-    if not text or not str(text).strip():
-        return None, None
 
-    scores = _SIA.polarity_scores(str(text))
-    compound = scores.get("compound", 0.0)
+def _init_worker() -> None:
+    """Build the analyzer once per worker process (loads the VADER lexicon)."""
+    global _SIA
+    _SIA = SentimentIntensityAnalyzer()
 
-    if compound >= 0.05:
-        label = "positive"
-    elif compound <= -0.05:
-        label = "negative"
-    else:
-        label = "neutral"
 
-    return compound, label
+def _score_text(text: str) -> dict | None:
+    """Score one text; top-level so it is picklable for multiprocessing."""
+    return _SIA.polarity_scores(text) if text else None
 
 
 def ensure_sentiment(
@@ -72,30 +69,61 @@ def ensure_sentiment(
     if label_col not in df.columns:
         df[label_col] = pd.NA
 
-    # Which rows still need sentiment?
-    mask = df[score_col].isna()
+    # Positions of rows that still need sentiment
+    todo = np.flatnonzero(df[score_col].isna().to_numpy())
 
-    if not mask.any():
+    if todo.size == 0:
         return df  # nothing to do
 
-    # Slice only rows that need sentiment
-    subset = df.loc[mask, list(text_columns)]
+    score_pos = df.columns.get_loc(score_col)
+    label_pos = df.columns.get_loc(label_col)
 
-    scores: list[float | None] = []
-    labels: list[str | None] = []
+    # Process in fixed-size chunks so the text slice never materializes the
+    # whole remaining DB at once
+    for start in range(0, todo.size, _CHUNK_ROWS):
+        rows = todo[start:start + _CHUNK_ROWS]
 
-    for _, row in subset.iterrows():
-        parts = []
+        # Build the per-row text with vectorized string ops (no iterrows);
+        # only the VADER call itself stays per-text (it's pure Python).
+        text_series: pd.Series | None = None
         for col in text_columns:
-            val = row.get(col)
-            if isinstance(val, str) and val.strip():
-                parts.append(val.strip())
-        text = " ".join(parts)
-        score, label = _sentiment_for_text(text)
-        scores.append(score)
-        labels.append(label)
-
-    df.loc[mask, score_col] = scores
-    df.loc[mask, label_col] = labels
+            if col not in df.columns:
+                continue
+            part = df[col].iloc[rows].fillna("").astype(str).str.strip()
+            text_series = part if text_series is None else text_series + " " + part
+
+        if text_series is None:
+            texts = [""] * rows.size
+        else:
+            texts = text_series.str.strip().to_list()
+
+        # Score each distinct text once: the same article often appears under
+        # several tickers/windows, and VADER output depends only on the text.
+        unique_texts = list(dict.fromkeys(texts))
+
+        # VADER is pure-Python and CPU-bound, with no cross-row state: spread
+        # big batches over all cores, stay sequential for small ones.
+        n_workers = os.cpu_count() or 1
+        if len(unique_texts) >= _PARALLEL_MIN_TEXTS and n_workers > 1:
+            with Pool(n_workers, initializer=_init_worker) as pool:
+                unique_results = pool.map(_score_text, unique_texts, chunksize=128)
+        else:
+            unique_results = [_score_text(t) for t in unique_texts]
+
+        result_by_text = dict(zip(unique_texts, unique_results))
+        results = [result_by_text[t] for t in texts]
+
+        compounds = np.array(
+            [r["compound"] if r is not None else np.nan for r in results], dtype=float
+        )
+        labels = np.where(
+            compounds >= 0.05,
+            "positive",
+            np.where(compounds <= -0.05, "negative", "neutral"),
+        ).astype(object)
+        labels[np.isnan(compounds)] = None  # empty texts get no label
+
+        df.iloc[rows, score_pos] = compounds
+        df.iloc[rows, label_pos] = labels
 
     return df